@@ -0,0 +1,279 @@
+"""
+Benchmark de extremo a extremo de process_meeting_video, etapa por etapa, en CPU.
+
+Uso (desde backend/):
+    python -m benchmark.run --lengths 60,300 --output bench_results.json
+    python -m benchmark.run --save-baseline          # guarda el resultado como referencia
+    python -m benchmark.run --baseline benchmark/baseline.json --tolerance 0.2
+"""
+import os
+
+# Forzar CPU antes de importar torch/whisperx para que las medidas sean reproducibles
+os.environ.setdefault("CUDA_VISIBLE_DEVICES", "")
+
+import sys
+import gc
+import json
+import time
+import argparse
+import logging
+import platform
+import resource
+import threading
+from datetime import datetime
+
+from services import engine
+from services.metrics import Trace
+from services.llm import build_transcript
+from benchmark.synth import ensure_meeting
+
+logger = logging.getLogger("Bench")
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_DATA_DIR = os.path.join(BENCH_DIR, "data")
+DEFAULT_BASELINE = os.path.join(BENCH_DIR, "baseline.json")
+DEFAULT_LENGTHS = "60,300,900"
+MIN_REGRESSION_SECONDS = 0.5  # Diferencias menores se consideran ruido
+
+def _current_rss_mb():
+    try:
+        with open("/proc/self/status", "r") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    # Fallback: máximo del proceso (en macOS ru_maxrss viene en bytes)
+    maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return maxrss / (1024 * 1024) if sys.platform == "darwin" else maxrss / 1024
+
+class StageTimer:
+    """Mide tiempo de pared y pico de RSS (muestreado) de una etapa"""
+
+    def __init__(self, interval=0.05):
+        self.interval = interval
+        self.peak_mb = 0.0
+        self._stop = threading.Event()
+
+    def _sample(self):
+        while not self._stop.is_set():
+            self.peak_mb = max(self.peak_mb, _current_rss_mb())
+            self._stop.wait(self.interval)
+
+    def __enter__(self):
+        gc.collect()
+        self.peak_mb = _current_rss_mb()
+        self._thread = threading.Thread(target=self._sample, daemon=True)
+        self._thread.start()
+        self._t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.wall_s = time.perf_counter() - self._t0
+        self._stop.set()
+        self._thread.join()
+        self.peak_mb = max(self.peak_mb, _current_rss_mb())
+        return False
+
+def stub_llm(transcript_text, attendees_list, *args, **kwargs):
+    """Sustituto determinista de generate_minutes (sin red)"""
+    return f"# Acta\n\nAsistentes: {', '.join(attendees_list)}\n\n{len(transcript_text.splitlines())} intervenciones."
+
+def label_from_turns(segments, turns):
+    """
+    Sin diarización los segmentos no tienen hablante y la fase visual no lee ningún
+    fotograma. Se etiquetan con el turno sintético con el que más se solapan.
+    """
+    for seg in segments:
+        start, end = seg.get("start"), seg.get("end")
+        if start is None or end is None:
+            continue
+        turn = max(turns, key=lambda t: min(end, t["end"]) - max(start, t["start"]))
+        if min(end, turn["end"]) > max(start, turn["start"]):
+            seg["speaker"] = f"SPEAKER_{turn['speaker']:02d}"
+    return segments
+
+def run_pipeline(video_path, duration, turns, hf_token=None):
+    """Ejecuta cada etapa del pipeline por separado y devuelve sus medidas"""
+    stages = {}
+
+    def record(name, timer, items=None):
+        stages[name] = {
+            "wall_s": round(timer.wall_s, 3),
+            "peak_rss_mb": round(timer.peak_mb, 1),
+            # Factor de tiempo real: segundos de cómputo por segundo de vídeo (<1 = más rápido que tiempo real)
+            "rtf": round(timer.wall_s / duration, 4),
+        }
+        if items is not None:
+            stages[name]["items"] = items
+            stages[name]["items_per_s"] = round(items / timer.wall_s, 2) if timer.wall_s else None
+        logger.info(f"[{name}] {timer.wall_s:.2f}s, pico {timer.peak_mb:.0f} MB")
+
+    with StageTimer() as t:
+        audio = engine.load_audio(video_path)
+    record("audio_decode", t)
+
+    speech_map = None
+    if engine.VAD_ENABLED:
+        with StageTimer() as t:
+            speech_map = engine.detect_speech(audio)
+            audio = speech_map.compact(audio)
+        record("vad", t)
+        stages["vad"]["skipped_ratio"] = speech_map.stats()["skipped_ratio"]
+
+    with StageTimer() as t:
+        result = engine.run_asr(audio)
+    record("asr", t, len(result["segments"]))
+
+    with StageTimer() as t:
+        result = engine.run_alignment(result, audio)
+    record("align", t, len(result["segments"]))
+
+    if hf_token:
+        with StageTimer() as t:
+            result = engine.run_diarization(result, audio, hf_token)
+        record("diarize", t, len(result["segments"]))
+    else:
+        logger.warning("Sin token de HuggingFace: se omite la diarización (hablantes tomados de los turnos sintéticos)")
+    if speech_map:
+        speech_map.remap_result(result)
+    segments = result["segments"]
+    if not hf_token:
+        label_from_turns(segments, turns)
+    del audio
+
+    with StageTimer() as t:
+        engine.init_ocr()
+    record("ocr_model_load", t)
+
+    # La fase visual se mide llamando a la función de producción (mismo control de flujo:
+    # solo segmentos con hablante, se para en el primer nombre, un fotograma cada vez)
+    trace = Trace()
+    with StageTimer() as t:
+        segments, speaker_map = engine.identify_speakers_visually(video_path, segments, debug_dir=None,
+                                                                  trace=trace, speech_map=speech_map)
+    visual = trace.spans[-1]["attrs"]
+    record("visual", t, visual["frames"])
+    stages["visual"].update({
+        "frame_decode_s": visual["seek_s"],
+        "ocr_s": visual["ocr_s"],
+        "ocr_fps": visual["ocr_fps"],
+    })
+
+    with StageTimer() as t:
+        transcript_text = build_transcript(segments, {})
+        stub_llm(transcript_text, sorted(speaker_map.values()))
+    record("minutes", t, len(segments))
+
+    stages["total"] = {
+        "wall_s": round(sum(s["wall_s"] for s in stages.values()), 3),
+        "peak_rss_mb": max(s["peak_rss_mb"] for s in stages.values()),
+    }
+    stages["total"]["rtf"] = round(stages["total"]["wall_s"] / duration, 4)
+    return stages
+
+def compare(results, baseline, tolerance):
+    """Devuelve la lista de regresiones de tiempo respecto a la referencia"""
+    regressions = []
+    base_runs = {r["video"]: r for r in baseline.get("runs", [])}
+    for run in results["runs"]:
+        base = base_runs.get(run["video"])
+        if not base:
+            continue
+        for stage, m in run["stages"].items():
+            b = base["stages"].get(stage)
+            if not b:
+                continue
+            diff = m["wall_s"] - b["wall_s"]
+            if diff > MIN_REGRESSION_SECONDS and m["wall_s"] > b["wall_s"] * (1 + tolerance):
+                regressions.append({
+                    "video": run["video"], "stage": stage,
+                    "baseline_s": b["wall_s"], "current_s": m["wall_s"],
+                    "ratio": round(m["wall_s"] / b["wall_s"], 2) if b["wall_s"] else None,
+                })
+    return regressions
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark del pipeline de actas con reuniones sintéticas")
+    parser.add_argument("--lengths", default=DEFAULT_LENGTHS, help="Duraciones en segundos, separadas por comas")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--data-dir", default=DEFAULT_DATA_DIR, help="Dónde se guardan los vídeos sintéticos")
+    parser.add_argument("--model", default="tiny", help="Modelo de WhisperX a usar (producción: large-v3)")
+    parser.add_argument("--hf-token-file", default="../../token-huggingface", help="Necesario para diarizar")
+    parser.add_argument("--output", default="bench_results.json")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--save-baseline", action="store_true", help="Guarda los resultados como nueva referencia")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Margen relativo antes de marcar regresión")
+    parser.add_argument("--no-vad", action="store_true", help="Procesar el audio completo sin saltar silencios")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+
+    engine.DEVICE = "cpu"
+    engine.COMPUTE_TYPE = "int8"
+    engine.WHISPER_MODEL = args.model
+    engine.VAD_ENABLED = not args.no_vad
+
+    hf_token = engine.load_hf_token(args.hf_token_file) if os.path.exists(args.hf_token_file) else None
+
+    results = {
+        "meta": {
+            "date": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "cpu_count": os.cpu_count(),
+            "torch": engine.torch.__version__,
+            "model": args.model,
+            "compute_type": engine.COMPUTE_TYPE,
+            "batch_size": engine.BATCH_SIZE,
+            "diarize": bool(hf_token),
+            "vad": engine.VAD_ENABLED,
+        },
+        "runs": [],
+    }
+
+    for length in [int(x) for x in args.lengths.split(",") if x.strip()]:
+        video_path, meta = ensure_meeting(args.data_dir, length, args.seed)
+        logger.info(f"=== {os.path.basename(video_path)} ({'TTS' if meta['tts'] else 'tonos'}) ===")
+        results["runs"].append({
+            "video": os.path.basename(video_path),
+            "duration_s": length,
+            "tts": meta["tts"],
+            "stages": run_pipeline(video_path, length, meta["turns"], hf_token),
+        })
+
+    # Una fase visual sin fotogramas no mide decodificación ni OCR: no vale como resultado ni referencia
+    empty_visual = [r["video"] for r in results["runs"] if r["stages"]["visual"]["items"] == 0]
+    results["meta"]["visual_empty"] = empty_visual
+
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(results, f, ensure_ascii=False, indent=2)
+    logger.info(f"Resultados guardados en {args.output}")
+
+    if empty_visual:
+        logger.error(f"La fase visual no procesó ningún fotograma en: {', '.join(empty_visual)}")
+        return 1
+
+    if args.save_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+        logger.info(f"Referencia actualizada: {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        logger.info("No hay referencia con la que comparar (usa --save-baseline)")
+        return 0
+
+    with open(args.baseline, "r", encoding="utf-8") as f:
+        baseline = json.load(f)
+    if baseline.get("meta", {}).get("model") != args.model:
+        logger.warning("La referencia se tomó con otro modelo; la comparación puede no ser válida")
+    regressions = compare(results, baseline, args.tolerance)
+    for r in regressions:
+        logger.error(f"REGRESIÓN {r['video']} [{r['stage']}]: {r['baseline_s']}s -> {r['current_s']}s (x{r['ratio']})")
+    if not regressions:
+        logger.info("Sin regresiones respecto a la referencia")
+    return 1 if regressions else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,126 @@
+"""Generación de reuniones sintéticas para el benchmark (solo ffmpeg, sin red)"""
+import os
+import json
+import random
+import shutil
+import subprocess
+import logging
+
+logger = logging.getLogger("Bench")
+
+SPEAKERS = [
+    ("Ana García López", "slt", 220),
+    ("Carlos Martín Ruiz", "kal", 330),
+    ("Lucía Fernández de la Torre", "awb", 440),
+    ("Javier Romero Sánchez", "rms", 550),
+]
+
+FRASES = [
+    "Buenos días a todos, comenzamos la reunión con el primer punto del orden del día.",
+    "Se propone aprobar el acta de la sesión anterior sin modificaciones.",
+    "Respecto al presupuesto, la comisión ha revisado las partidas y no hay objeciones.",
+    "Quería comentar que el plazo de entrega del informe se amplía hasta final de mes.",
+    "Pasamos a votación. Se aprueba por unanimidad.",
+    "¿Alguien tiene alguna pregunta antes de continuar con el siguiente punto?",
+]
+
+WIDTH, HEIGHT, FPS = 1280, 720, 25
+FONT_CANDIDATES = [
+    "/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf",
+    "/usr/share/fonts/dejavu/DejaVuSans-Bold.ttf",
+]
+
+def _ffmpeg():
+    return shutil.which("ffmpeg") or "/bin/ffmpeg"
+
+def has_flite():
+    """Comprueba si ffmpeg está compilado con el filtro de síntesis de voz flite"""
+    try:
+        out = subprocess.run([_ffmpeg(), "-hide_banner", "-filters"], capture_output=True, text=True, timeout=30)
+        return " flite " in out.stdout
+    except (OSError, subprocess.TimeoutExpired):
+        return False
+
+def build_turns(duration, seed=0, min_turn=8.0, max_turn=30.0):
+    """Reparte la duración en turnos de palabra alternando hablantes de forma reproducible"""
+    rng = random.Random(seed)
+    turns = []
+    t = 0.0
+    prev = None
+    while t < duration:
+        length = rng.uniform(min_turn, max_turn)
+        if duration - t - length < min_turn:
+            length = duration - t  # El último turno absorbe el resto
+        speaker = rng.choice([i for i in range(len(SPEAKERS)) if i != prev])
+        turns.append({
+            "speaker": speaker,
+            "name": SPEAKERS[speaker][0],
+            "start": round(t, 2),
+            "end": round(t + length, 2),
+            "text": rng.choice(FRASES),
+        })
+        prev = speaker
+        t += length
+    return turns
+
+def _safe_text(text):
+    """Elimina los caracteres con significado especial en los filtros de ffmpeg"""
+    return "".join(c for c in text if c not in "\\:'\",;[]=¿?")
+
+def _font_option():
+    font = next((f for f in FONT_CANDIDATES if os.path.exists(f)), None)
+    return f"fontfile={font}:" if font else ""
+
+def _turn_audio_source(turn, use_tts):
+    _, voice, freq = SPEAKERS[turn["speaker"]]
+    length = turn["end"] - turn["start"]
+    audio_format = "aresample=16000,aformat=sample_rates=16000:channel_layouts=mono"
+    if use_tts:
+        # Frase sintetizada seguida de silencio hasta completar el turno
+        return f"flite=text='{_safe_text(turn['text'])}':voice={voice},apad,atrim=0:{length:.2f},{audio_format}"
+    return f"sine=frequency={freq}:sample_rate=16000:duration={length:.2f},{audio_format}"
+
+def generate_meeting(out_path, duration, seed=0, use_tts=None):
+    """Genera un vídeo de reunión con audio (TTS o tonos) y rótulos de nombre en el tercio inferior"""
+    if use_tts is None:
+        use_tts = has_flite()
+    turns = build_turns(duration, seed)
+
+    cmd = [_ffmpeg(), "-hide_banner", "-loglevel", "error", "-y",
+           "-f", "lavfi", "-i", f"color=c=0x303840:s={WIDTH}x{HEIGHT}:r={FPS}:d={duration}"]
+    for turn in turns:
+        cmd += ["-f", "lavfi", "-i", _turn_audio_source(turn, use_tts)]
+
+    # Rótulo: franja en la zona que lee el OCR (85%-98% de la altura) + nombre del hablante activo
+    overlays = [f"drawbox=x=0:y=ih*0.86:w=iw:h=ih*0.11:color=black@0.7:t=fill"]
+    for turn in turns:
+        overlays.append(
+            f"drawtext={_font_option()}text='{_safe_text(turn['name'])}':fontcolor=white:fontsize=42:"
+            f"x=40:y=h*0.885:enable='between(t,{turn['start']},{turn['end']})'"
+        )
+    audio_inputs = "".join(f"[{i + 1}:a]" for i in range(len(turns)))
+    filter_complex = (
+        f"[0:v]{','.join(overlays)}[v];"
+        f"{audio_inputs}concat=n={len(turns)}:v=0:a=1[a]"
+    )
+    cmd += ["-filter_complex", filter_complex, "-map", "[v]", "-map", "[a]",
+            "-c:v", "libx264", "-preset", "ultrafast", "-crf", "28",
+            "-c:a", "aac", "-t", str(duration), out_path]
+
+    logger.info(f"Generando reunión sintética de {duration}s en {out_path}")
+    subprocess.run(cmd, check=True, capture_output=True, text=True)
+
+    meta = {"duration": duration, "seed": seed, "tts": use_tts, "turns": turns}
+    with open(out_path + ".json", "w", encoding="utf-8") as f:
+        json.dump(meta, f, ensure_ascii=False, indent=2)
+    return meta
+
+def ensure_meeting(data_dir, duration, seed=0):
+    """Devuelve (ruta, metadatos) de la reunión sintética, generándola solo si no existe"""
+    os.makedirs(data_dir, exist_ok=True)
+    out_path = os.path.join(data_dir, f"meeting_{duration}s_seed{seed}.mp4")
+    meta_path = out_path + ".json"
+    if os.path.exists(out_path) and os.path.exists(meta_path):
+        with open(meta_path, "r", encoding="utf-8") as f:
+            return out_path, json.load(f)
+    return out_path, generate_meeting(out_path, duration, seed)
@@ -0,0 +1,239 @@
+"""
+Procesamiento por lotes de grabaciones sin pasar por /upload ni la interfaz web.
+
+Uso (desde backend/, igual que el servidor):
+    python ingest.py /ruta/grabaciones
+    python ingest.py "/ruta/grabaciones/2024-*.mp4" --attendees asistentes.xlsx --minutes
+
+Usa el mismo motor que process_meeting_video. Mientras se hace el OCR de un
+archivo se transcribe el siguiente, y los archivos cuyo contenido ya se procesó
+(por hash) se saltan. Las sesiones se escriben directamente en SESSIONS_DIR y
+aparecen en la lista de sesiones de la aplicación.
+"""
+import os
+import sys
+import glob
+import json
+import shutil
+import logging
+import argparse
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+
+from services.storage import SESSIONS_DIR, UPLOAD_DIR, TOKEN_FILE, save_acta_files, sanitize_name
+from services.engine import load_hf_token, init_ocr, transcribe_audio, process_visual_phase
+from services.llm import generate_minutes, build_transcript, is_minutes_error
+from services.metrics import Trace, stage
+from services.roster import file_hash, parse_attendees_cached, get_roster
+
+logger = logging.getLogger("Ingest")
+
+VIDEO_EXTENSIONS = ('.mp4', '.webm', '.mov', '.avi', '.mkv', '.m4v')
+INDEX_FILE = os.path.join(SESSIONS_DIR, ".ingest_index.json")  # hash de contenido -> sesión
+
+def collect_videos(inputs):
+    """Expande directorios y patrones glob en una lista ordenada de vídeos sin repetir"""
+    paths = []
+    for item in inputs:
+        if os.path.isdir(item):
+            candidates = [os.path.join(item, f) for f in os.listdir(item)]
+        else:
+            candidates = glob.glob(item, recursive=True)
+        paths += [os.path.abspath(p) for p in candidates
+                  if os.path.isfile(p) and p.lower().endswith(VIDEO_EXTENSIONS)]
+    return sorted(set(paths))
+
+def load_index():
+    if not os.path.exists(INDEX_FILE):
+        return {}
+    with open(INDEX_FILE, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+def save_index(index):
+    tmp = INDEX_FILE + ".tmp"
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(index, f, ensure_ascii=False, indent=2)
+    os.replace(tmp, INDEX_FILE)
+
+def publish_video(video_path, content_hash):
+    """Deja el vídeo accesible en /files (enlace duro si es posible, si no copia)"""
+    # El hash en el nombre evita confundir grabaciones distintas con el mismo nombre (p. ej. zoom_0.mp4)
+    stem, ext = os.path.splitext(os.path.basename(video_path))
+    filename = f"{stem.replace(' ', '_')}_{content_hash[:8]}{ext}"
+    target = os.path.join(UPLOAD_DIR, filename)
+    if not os.path.exists(target):
+        try:
+            os.link(video_path, target)
+        except OSError:
+            shutil.copy2(video_path, target)
+    return f"/files/{filename}"
+
+def choose_session_name(video_path, content_hash, index, reserved):
+    """Nombre de sesión a partir del archivo, sin pisar sesiones de otro contenido ni de este lote"""
+    base = sanitize_name(os.path.splitext(os.path.basename(video_path))[0], "session_unnamed")
+
+    def taken(name):
+        if name in reserved:
+            return True
+        # Reprocesar el mismo contenido (--force) puede reutilizar su propia sesión
+        return os.path.exists(os.path.join(SESSIONS_DIR, f"{name}.json")) and index.get(content_hash) != name
+
+    candidate = base
+    if taken(candidate):
+        candidate = f"{base}_{content_hash[:8]}"
+    n = 2
+    while taken(candidate):
+        candidate = f"{base}_{content_hash[:8]}_{n}"
+        n += 1
+    return candidate
+
+def write_session(session_name, video_path, content_hash, result, attendees_list, trace):
+    """Escribe la sesión con el mismo formato que guarda el frontend"""
+    speaker_mapping = dict(result["speakers_found"])
+    for seg in result["segments"]:
+        speaker = seg.get("speaker")
+        if speaker and speaker not in speaker_mapping:
+            speaker_mapping[speaker] = ""
+
+    session_data = {
+        "segments": result["segments"],
+        "speakerMapping": speaker_mapping,
+        "attendees": attendees_list,
+        "video_url": publish_video(video_path, content_hash),
+        "version": 1,
+        "ingest": {
+            "source": video_path,
+            "content_hash": content_hash,
+            "language": result.get("language"),
+            "processed_at": datetime.now().isoformat(timespec="seconds"),
+            "trace": trace.to_dict(),
+        },
+    }
+    file_path = os.path.join(SESSIONS_DIR, f"{session_name}.json")
+    with open(file_path, 'w', encoding='utf-8') as f:
+        json.dump(session_data, f, ensure_ascii=False, separators=(",", ":"))
+    logger.info(f"Sesión guardada: {file_path}")
+    return session_data
+
+def write_minutes(session_name, session_data, model_name, trace):
+    transcript_text = build_transcript(session_data["segments"], session_data["speakerMapping"])
+    with stage("generate_minutes", trace):
+        minutes_md = generate_minutes(transcript_text, session_data["attendees"], None, model_name, trace=trace)
+    if is_minutes_error(minutes_md):
+        # No guardar el mensaje de error como si fuera el acta; se cuenta como fallo
+        raise RuntimeError(f"Acta de {session_name} no generada: {minutes_md.splitlines()[0] if minutes_md else 'respuesta vacía'}")
+    acta_files = save_acta_files(session_name, minutes_md, trace)
+    logger.info(f"Acta de {session_name}: {acta_files}")
+    return acta_files
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Procesa por lotes una carpeta o patrón de grabaciones")
+    parser.add_argument("inputs", nargs="+", help="Directorios o patrones glob (entre comillas)")
+    parser.add_argument("--attendees", help="Lista de asistentes (Excel/CSV/ODS) común a todas las grabaciones")
+    parser.add_argument("--roster-id", help="ID de una lista de asistentes ya subida a /rosters")
+    parser.add_argument("--minutes", action="store_true", help="Generar también el acta con Gemini")
+    parser.add_argument("--model", default=os.getenv("GEMINI_MODEL", "gemini-2.0-flash"))
+    parser.add_argument("--token-file", default=TOKEN_FILE, help="Token de HuggingFace para diarizar")
+    parser.add_argument("--force", action="store_true", help="Reprocesar aunque el contenido ya esté procesado")
+    parser.add_argument("--no-overlap", action="store_true",
+                        help="No solapar el OCR de un archivo con el ASR del siguiente (p. ej. GPU con poca memoria)")
+    args = parser.parse_args(argv)
+
+    videos = collect_videos(args.inputs)
+    if not videos:
+        logger.error("No se encontraron vídeos")
+        return 1
+
+    hf_token = load_hf_token(os.path.abspath(args.token_file))
+    if not hf_token:
+        logger.error("Token no válido o no encontrado")
+        return 1
+
+    attendees_list = []
+    if args.attendees:
+        _, attendees_list = parse_attendees_cached(args.attendees)
+        if attendees_list is None:
+            logger.error(f"No se pudo leer la lista de asistentes: {args.attendees}")
+            return 1
+    elif args.roster_id:
+        attendees_list = get_roster(args.roster_id)
+        if attendees_list is None:
+            logger.error(f"Lista de asistentes no encontrada: {args.roster_id}")
+            return 1
+
+    init_ocr()
+    index = load_index()
+    seen = set()
+    reserved = set()  # Nombres de sesión ya asignados en este lote (aunque aún no estén en disco)
+    failures = 0
+
+    # Un hilo para la fase visual (OCR) y otros para las actas (esperan a la red)
+    visual_pool = ThreadPoolExecutor(max_workers=1)
+    minutes_pool = ThreadPoolExecutor(max_workers=2) if args.minutes else None
+    minutes_jobs = []
+    pending = None  # (nombre, ruta, hash, traza, future) de la fase visual en curso
+
+    def finish(job):
+        nonlocal failures
+        session_name, video_path, content_hash, trace, future = job
+        try:
+            result = future.result()
+            session_data = write_session(session_name, video_path, content_hash, result, attendees_list, trace)
+        except Exception as e:
+            logger.error(f"Error en la fase visual de {video_path}: {e}", exc_info=True)
+            failures += 1
+            return
+        index[content_hash] = session_name
+        save_index(index)
+        if minutes_pool:
+            minutes_jobs.append(minutes_pool.submit(write_minutes, session_name, session_data, args.model, trace))
+
+    for i, video_path in enumerate(videos, 1):
+        logger.info(f"=== [{i}/{len(videos)}] {video_path} ===")
+        content_hash = file_hash(video_path)
+        if not args.force and content_hash in index:
+            logger.info(f"Ya procesado como sesión '{index[content_hash]}', se omite")
+            continue
+        if content_hash in seen:
+            logger.info("Contenido idéntico a otro archivo de este lote, se omite")
+            continue
+        seen.add(content_hash)
+
+        session_name = choose_session_name(video_path, content_hash, index, reserved)
+        reserved.add(session_name)
+        trace = Trace()
+        try:
+            transcript = transcribe_audio(video_path, hf_token, trace)
+        except Exception as e:
+            logger.error(f"Error transcribiendo {video_path}: {e}", exc_info=True)
+            failures += 1
+            continue
+
+        # Como mucho una fase visual pendiente: se espera a la del archivo anterior antes de encolar esta
+        if pending:
+            finish(pending)
+        # Sin fotogramas de debug: no escribir en la carpeta de grabaciones (puede ser de solo lectura)
+        future = visual_pool.submit(process_visual_phase, video_path, transcript, trace, debug_dir=None)
+        pending = (session_name, video_path, content_hash, trace, future)
+        if args.no_overlap:
+            finish(pending)
+            pending = None
+
+    if pending:
+        finish(pending)
+    visual_pool.shutdown()
+
+    for job in minutes_jobs:
+        try:
+            job.result()
+        except Exception as e:
+            logger.error(f"Error generando acta: {e}", exc_info=True)
+            failures += 1
+    if minutes_pool:
+        minutes_pool.shutdown()
+
+    logger.info(f"Terminado: {len(videos)} archivos, {failures} errores")
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
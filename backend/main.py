@@ -1,14 +1,21 @@
-from fastapi import FastAPI, UploadFile, File, BackgroundTasks, HTTPException, Body
+from fastapi import FastAPI, UploadFile, File, Form, BackgroundTasks, HTTPException, Body, Response
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
+from fastapi.responses import FileResponse
 from services.engine import process_meeting_video
-from services.llm import generate_minutes
+from services.llm import generate_minutes, build_transcript
+from services.roster import (parse_attendees_cached, save_roster_file, get_roster, list_rosters, delete_roster,
+                             roster_extension)
+from services.columnar import CompactTranscript
+from services.storage import (UPLOAD_DIR, SESSIONS_DIR, ACTAS_DIR, TRANSCRIPTS_DIR, TOKEN_FILE,
+                              sanitize_name, save_acta_files)
+from services.metrics import Trace, stage, observe, render_metrics, QUEUE_DEPTH, JOBS_IN_PROGRESS, JOBS_TOTAL
 import shutil
 import os
 import uuid
+import time
 import logging
 import json
-import pandas as pd
 from typing import Optional, Dict
 import glob
 import subprocess
@@ -21,16 +28,6 @@ class TrimRequest(BaseModel):
     start: float
     end: float
 
-# Configuración
-UPLOAD_DIR = os.path.abspath("../uploads") 
-SESSIONS_DIR = os.path.abspath("../sessions") # Nuevo directorio para sesiones
-ACTAS_DIR = os.path.abspath("../actas")  # Directorio para actas generadas
-TOKEN_FILE = "../../token-huggingface"
-
-os.makedirs(UPLOAD_DIR, exist_ok=True)
-os.makedirs(SESSIONS_DIR, exist_ok=True)
-os.makedirs(ACTAS_DIR, exist_ok=True)
-
 # Logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger("API")
@@ -55,122 +52,67 @@ app.mount("/actas", StaticFiles(directory=ACTAS_DIR), name="actas")
 # Base de datos en memoria
 jobs_db = {}
 
-# --- FUNCIONES AUXILIARES ---
+def clean_transcripts():
+    """Borra los .bin huérfanos: jobs_db está en memoria y al arrancar ningún trabajo los referencia"""
+    for name in os.listdir(TRANSCRIPTS_DIR):
+        if name.endswith((".bin", ".tmp")):
+            os.remove(os.path.join(TRANSCRIPTS_DIR, name))
 
-def save_acta_files(session_name: str, minutes_md: str) -> dict:
-    """Guarda el acta en markdown y la convierte a PDF con pandoc"""
-    # Limpiar nombre de archivo
-    safe_name = "".join([c for c in session_name if c.isalnum() or c in (' ', '-', '_')]).strip()
-    if not safe_name:
-        safe_name = "acta_sin_nombre"
-    
-    md_filename = f"acta_{safe_name}.md"
-    pdf_filename = f"acta_{safe_name}.pdf"
-    
-    md_path = os.path.join(ACTAS_DIR, md_filename)
-    pdf_path = os.path.join(ACTAS_DIR, pdf_filename)
-    
-    result = {"md": None, "pdf": None}
-    
-    try:
-        # Guardar markdown
-        with open(md_path, 'w', encoding='utf-8') as f:
-            f.write(minutes_md)
-        result["md"] = f"/actas/{md_filename}"
-        logger.info(f"Acta markdown guardada: {md_path}")
-        
-        # Convertir a PDF con pandoc
-        try:
-            subprocess.run([
-                "pandoc", md_path, 
-                "-o", pdf_path,
-                "--pdf-engine=xelatex",
-                "-V", "geometry:margin=2.5cm",
-                "-V", "mainfont:DejaVu Sans",
-                "-V", "fontsize=11pt",
-                "--toc",
-                "--toc-depth=2"
-            ], check=True, capture_output=True, text=True)
-            result["pdf"] = f"/actas/{pdf_filename}"
-            logger.info(f"Acta PDF generada: {pdf_path}")
-        except subprocess.CalledProcessError as e:
-            logger.error(f"Error convirtiendo a PDF: {e.stderr}")
-        except FileNotFoundError:
-            logger.warning("pandoc no encontrado, saltando conversión a PDF")
-    except Exception as e:
-        logger.error(f"Error guardando acta: {e}")
-    
-    return result
+clean_transcripts()
 
-def parse_attendees(file_path):
-    """Lee el Excel e intenta reconstruir nombres completos de forma inteligente"""
-    try:
-        df = pd.read_excel(file_path)
-        df.columns = [str(c).strip() for c in df.columns]
-        normalized_cols = {c.lower(): c for c in df.columns}
-        
-        logger.info(f"Columnas encontradas en Excel: {list(df.columns)}")
-        
-        name_col = None
-        surname_col = None
-        
-        posibles_apellidos = ['apellidos', 'apellido', 'surname', 'surnames', 'last name', 'lastname', 'primer apellido']
-        for cand in posibles_apellidos:
-            match = next((c for c in normalized_cols if cand == c or cand in c), None)
-            if match:
-                surname_col = normalized_cols[match]
-                break
+# Profundidad de cola calculada en cada scrape de /metrics
+QUEUE_DEPTH.set_function(lambda: sum(1 for job in list(jobs_db.values()) if job["status"] == "queued"))
 
-        posibles_nombres = ['nombre', 'nombres', 'name', 'firstname', 'first name']
-        for cand in posibles_nombres:
-             match = next((c for c in normalized_cols if cand == c or cand in c), None)
-             if match and match != surname_col:
-                 name_col = normalized_cols[match]
-                 break
-        
-        full_names = []
-        
-        if name_col and surname_col and name_col != surname_col:
-            for _, row in df.iterrows():
-                n = str(row[name_col]).strip()
-                s = str(row[surname_col]).strip()
-                if n.lower() in ['nan', 'nat'] : n = ""
-                if s.lower() in ['nan', 'nat'] : s = ""
-                if n and s: full_names.append(f"{n} {s}")
-                elif n: full_names.append(n)
-                elif s: full_names.append(s)
-        elif name_col or surname_col:
-            target = name_col or surname_col
-            full_names = [n.strip() for n in df[target].dropna().astype(str).tolist()]
-        else:
-            for col in df.columns:
-                sample = df[col].dropna().head(5).astype(str).tolist()
-                if sum(not s.isnumeric() for s in sample) >= len(sample) * 0.8:
-                    full_names = df[col].dropna().astype(str).tolist()
-                    break
+# --- FUNCIONES AUXILIARES ---
 
-        return sorted(list(set([n.title() for n in full_names if n and n.lower() != "nan" and len(n) > 2])))
-    except Exception as e:
-        logger.error(f"Error leyendo Excel: {e}")
-        return []
+def store_result(job_id: str, result: dict) -> CompactTranscript:
+    """Pasa el resultado a formato columnar, lo guarda en disco y lo devuelve mapeado en memoria"""
+    meta = {k: v for k, v in result.items() if k != "segments"}
+    compact = CompactTranscript.from_segments(result["segments"], meta)
+    path = compact.save(os.path.join(TRANSCRIPTS_DIR, f"{job_id}.bin"))
+    logger.info(f"Transcripción de {job_id}: {len(compact)} segmentos, {compact.nbytes() / (1024*1024):.1f} MB en columnas")
+    return CompactTranscript.load(path)
+
+def result_to_json(compact: CompactTranscript, include_words: bool = True) -> dict:
+    """Reconstruye el resultado en JSON (formato WhisperX) solo para responder a la API"""
+    return {"segments": compact.to_segments(include_words), **compact.meta}
 
-def task_process_video(job_id: str, video_path: str, attendees_path: Optional[str] = None):
+def task_process_video(job_id: str, video_path: str, attendees_path: Optional[str] = None,
+                       roster_id: Optional[str] = None, attendees_name: Optional[str] = None):
+    trace = jobs_db[job_id]["trace"]
+    queued_at = jobs_db[job_id]["queued_at"]
+    queue_wait = time.time() - queued_at
+    observe("queue_wait", queue_wait)
+    trace.add("queue_wait", queued_at, queue_wait)
     try:
         jobs_db[job_id]["status"] = "processing"
-        attendees_list = []
-        if attendees_path:
-            attendees_list = parse_attendees(attendees_path)
-            jobs_db[job_id]["attendees"] = attendees_list
-        
-        abs_token_path = os.path.abspath(TOKEN_FILE)
-        result = process_meeting_video(video_path, abs_token_path)
+        with JOBS_IN_PROGRESS.track_inprogress():
+            if attendees_path:
+                with stage("parse_attendees", trace):
+                    roster_id, attendees_list = parse_attendees_cached(attendees_path, attendees_name, roster_id)
+                if attendees_list is None:
+                    logger.warning(f"Job {job_id}: no se pudo leer la lista de asistentes, se continúa sin ella")
+                jobs_db[job_id]["attendees"] = attendees_list or []
+                jobs_db[job_id]["roster_id"] = roster_id
+            elif roster_id:
+                jobs_db[job_id]["attendees"] = get_roster(roster_id) or []
+                jobs_db[job_id]["roster_id"] = roster_id
+            
+            abs_token_path = os.path.abspath(TOKEN_FILE)
+            with stage("process_meeting_video", trace):
+                result = process_meeting_video(video_path, abs_token_path, trace=trace)
+            with stage("store_result", trace):
+                compact = store_result(job_id, result)
+            del result
         
-        jobs_db[job_id]["result"] = result
+        jobs_db[job_id]["result"] = compact
         jobs_db[job_id]["status"] = "completed"
+        JOBS_TOTAL.labels(status="completed").inc()
     except Exception as e:
         logger.error(f"Error en job {job_id}: {e}")
         jobs_db[job_id]["status"] = "failed"
         jobs_db[job_id]["error"] = str(e)
+        JOBS_TOTAL.labels(status="failed").inc()
 
 # --- ENDPOINTS ---
 
@@ -178,8 +120,18 @@ def task_process_video(job_id: str, video_path: str, attendees_path: Optional[st
 async def upload_video(
     file: UploadFile = File(...), 
     attendees: Optional[UploadFile] = File(None),
+    roster_id: Optional[str] = Form(None),
     background_tasks: BackgroundTasks = None
 ):
+    # Validar la lista de asistentes antes de escribir el vídeo (un error no deja subidas huérfanas)
+    if attendees:
+        try:
+            roster_extension(attendees.filename)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+    elif roster_id and get_roster(roster_id) is None:
+        raise HTTPException(status_code=404, detail="Lista de asistentes no encontrada")
+
     # Usar nombre de archivo original para evitar duplicados (limpiando espacios)
     safe_filename = file.filename.replace(" ", "_")
     video_path = os.path.join(UPLOAD_DIR, safe_filename)
@@ -190,19 +142,21 @@ async def upload_video(
     # El job_id sigue siendo único para la sesión actual de procesamiento
     job_id = str(uuid.uuid4())
     
+    # Lista de asistentes: archivo nuevo (se guarda por hash) o roster ya subido referenciado por ID
     attendees_path = None
+    attendees_name = None
     if attendees:
-        attendees_filename = f"attendees_{safe_filename}.xlsx"
-        attendees_path = os.path.join(UPLOAD_DIR, attendees_filename)
-        with open(attendees_path, "wb+") as f:
-            shutil.copyfileobj(attendees.file, f)
-            
+        roster_id, attendees_path = save_roster_file(attendees.file, attendees.filename)
+        attendees_name = attendees.filename
+
     jobs_db[job_id] = {
         "status": "queued",
         "video_filename": safe_filename,
-        "path": video_path
+        "path": video_path,
+        "queued_at": time.time(),
+        "trace": Trace()
     }
-    background_tasks.add_task(task_process_video, job_id, video_path, attendees_path)
+    background_tasks.add_task(task_process_video, job_id, video_path, attendees_path, roster_id, attendees_name)
     return {"job_id": job_id, "status": "queued"}
 
 @app.post("/generate-minutes/{job_id}")
@@ -220,47 +174,25 @@ async def api_generate_minutes(job_id: str, payload: Dict = Body(...)):
             if job_id not in jobs_db or jobs_db[job_id]["status"] != "completed":
                 raise HTTPException(status_code=400, detail="Sesión no lista o datos faltantes en la petición")
             job = jobs_db[job_id]
-            segments = job["result"]["segments"]
+            segments = job["result"].to_segments(include_words=False)
             attendees_list = job.get("attendees", [])
 
-        full_transcript = []
+        # Las sesiones cargadas desde disco no tienen job en memoria ni traza
+        trace = jobs_db[job_id]["trace"] if job_id in jobs_db else None
         
         # Debug: Verificar estructura de segments
         logger.info(f"Procesando {len(segments)} segmentos para el acta")
-
-        for i, seg in enumerate(segments):
-            try:
-                # Asegurar que seg es un dict
-                if not isinstance(seg, dict):
-                    logger.warning(f"Segmento {i} no es un diccionario: {type(seg)}")
-                    continue
-                    
-                # Obtener speaker de forma segura
-                original_speaker = seg.get("speaker") if "speaker" in seg else "Desconocido"
-                if original_speaker is None:
-                    original_speaker = "Desconocido"
-                    
-                final_name = speaker_mapping.get(original_speaker, original_speaker)
-                if not final_name: 
-                    final_name = "Desconocido"
-                
-                text = seg.get("text", "").strip()
-                if text:  # Solo añadir si hay texto
-                    full_transcript.append(f"{final_name}: {text}")
-            except Exception as e:
-                logger.error(f"Error procesando segmento {i}: {e}")
-                continue
-        
-        transcript_text = "\n".join(full_transcript)
+        transcript_text = build_transcript(segments, speaker_mapping)
         
         google_token = payload.get("google_user_token")
         model_name = payload.get("model", "gemini-2.0-flash-exp")
         session_name = payload.get("session_name", job_id)  # Nombre de la sesión para guardar el acta
         
-        minutes_md = generate_minutes(transcript_text, attendees_list, google_token, model_name)
+        with stage("generate_minutes", trace):
+            minutes_md = generate_minutes(transcript_text, attendees_list, google_token, model_name, trace=trace)
         
         # Guardar el acta en markdown y convertir a PDF
-        acta_files = save_acta_files(session_name, minutes_md)
+        acta_files = save_acta_files(session_name, minutes_md, trace)
         
         return {"minutes": minutes_md, "acta_files": acta_files}
         
@@ -271,18 +203,33 @@ async def api_generate_minutes(job_id: str, payload: Dict = Body(...)):
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/status/{job_id}")
-async def get_status(job_id: str):
+def get_status(job_id: str, include_words: bool = True):
     if job_id not in jobs_db:
         raise HTTPException(status_code=404, detail="Job not found")
     job = jobs_db[job_id]
     if job["status"] == "completed":
         return {
             "status": "completed",
-            "result": job["result"],
+            "result": result_to_json(job["result"], include_words),
             "attendees": job.get("attendees", []),
-            "video_url": f"/files/{job['video_filename']}"
+            "video_url": f"/files/{job['video_filename']}",
+            "trace": job["trace"].to_dict()
         }
-    return {"status": job["status"], "error": job.get("error")}
+    return {"status": job["status"], "error": job.get("error"), "trace": job["trace"].to_dict()}
+
+@app.get("/transcripts/{job_id}")
+def download_transcript(job_id: str):
+    """Transcripción en el formato binario columnar, para clientes que no necesiten JSON"""
+    if job_id not in jobs_db or jobs_db[job_id]["status"] != "completed":
+        raise HTTPException(status_code=404, detail="Transcripción no disponible")
+    path = os.path.join(TRANSCRIPTS_DIR, f"{job_id}.bin")
+    return FileResponse(path, media_type="application/octet-stream", filename=f"{job_id}.bin")
+
+@app.get("/metrics")
+def metrics():
+    """Métricas en formato Prometheus (histogramas por etapa, cola, memoria GPU, OCR)"""
+    content, content_type = render_metrics()
+    return Response(content=content, media_type=content_type)
 
 # --- ENDPOINTS DE SESIÓN ---
 
@@ -318,15 +265,15 @@ def save_session(payload: Dict = Body(...)):
     """Guarda una sesión en el servidor"""
     name = payload.get("name", "sin_titulo").strip()
     # Limpiar nombre de archivo (básico)
-    safe_name = "".join([c for c in name if c.isalnum() or c in (' ', '-', '_')]).strip()
-    if not safe_name: safe_name = "session_unnamed"
+    safe_name = sanitize_name(name, "session_unnamed")
     
     file_path = os.path.join(SESSIONS_DIR, f"{safe_name}.json")
     
     # Guardar datos
     try:
         with open(file_path, 'w', encoding='utf-8') as f:
-            json.dump(payload["data"], f, ensure_ascii=False, indent=2)
+            # Sin sangría: las sesiones largas ocupan bastante menos
+            json.dump(payload["data"], f, ensure_ascii=False, separators=(",", ":"))
         return {"message": "Sesión guardada", "filename": safe_name}
     except Exception as e:
         logger.error(f"Error guardando sesión: {e}")
@@ -347,6 +294,40 @@ def load_session(name: str):
         logger.error(f"Error cargando sesión: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+# --- ENDPOINTS DE LISTAS DE ASISTENTES ---
+
+@app.get("/rosters")
+def api_list_rosters():
+    """Lista las listas de asistentes subidas"""
+    return list_rosters()
+
+@app.post("/rosters")
+def api_upload_roster(file: UploadFile = File(...)):
+    """Sube una lista de asistentes (Excel/CSV/ODS) una sola vez y devuelve su ID para reutilizarla"""
+    try:
+        roster_id, path = save_roster_file(file.file, file.filename)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    roster_id, attendees_list = parse_attendees_cached(path, file.filename, roster_id)
+    if attendees_list is None:
+        raise HTTPException(status_code=422, detail="No se pudo leer la lista de asistentes")
+    return {"id": roster_id, "name": file.filename, "attendees": attendees_list}
+
+@app.get("/rosters/{roster_id}")
+def api_get_roster(roster_id: str):
+    """Devuelve los nombres parseados de una lista de asistentes"""
+    attendees_list = get_roster(roster_id)
+    if attendees_list is None:
+        raise HTTPException(status_code=404, detail="Lista de asistentes no encontrada")
+    return {"id": roster_id, "attendees": attendees_list}
+
+@app.delete("/rosters/{roster_id}")
+def api_delete_roster(roster_id: str):
+    """Elimina una lista de asistentes"""
+    if not delete_roster(roster_id):
+        raise HTTPException(status_code=404, detail="Lista de asistentes no encontrada")
+    return {"message": "Lista eliminada"}
+
 # --- ENDPOINT TRIM ---
 @app.post("/trim-video")
 async def trim_video(request: TrimRequest):
@@ -396,13 +377,14 @@ async def trim_video(request: TrimRequest):
         
         # Ejecutar con timeout y mejor logging
         try:
-            process = subprocess.run(
-                cmd, 
-                stdout=subprocess.PIPE, 
-                stderr=subprocess.PIPE,
-                text=True,
-                timeout=300  # 5 minutos máximo
-            )
+            with stage("trim_video"):
+                process = subprocess.run(
+                    cmd, 
+                    stdout=subprocess.PIPE, 
+                    stderr=subprocess.PIPE,
+                    text=True,
+                    timeout=300  # 5 minutos máximo
+                )
             
             logger.info(f"FFmpeg stdout: {process.stdout}")
             if process.stderr:
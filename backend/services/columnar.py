@@ -0,0 +1,203 @@
+import os
+import json
+import struct
+import logging
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Formato de archivo: MAGIC | uint64 longitud de cabecera | cabecera JSON | arrays alineados a ALIGN bytes
+MAGIC = b"ACTACOL1"
+ALIGN = 64
+NO_SPEAKER = -1
+
+class CompactTranscript:
+    """
+    Segmentos y palabras de WhisperX en columnas NumPy (struct-of-arrays).
+
+    Los tiempos y puntuaciones son float32 (NaN si WhisperX no los da), los
+    hablantes se guardan como índices a una tabla única y los textos como
+    índices a una tabla de cadenas (UTF-8 + offsets). Las palabras de cada
+    segmento son el rango seg_word_offset[i]:seg_word_offset[i + 1].
+    """
+
+    COLUMNS = ("seg_start", "seg_end", "seg_speaker", "seg_text", "seg_word_offset",
+               "word_start", "word_end", "word_score", "word_speaker", "word_text",
+               "strings_blob", "strings_offset")
+
+    def __init__(self, columns, speakers, meta=None):
+        for name in self.COLUMNS:
+            setattr(self, name, columns[name])
+        self.speakers = list(speakers)
+        self.meta = meta or {}
+
+    def __len__(self):
+        return len(self.seg_start)
+
+    # --- Construcción ---
+
+    @classmethod
+    def from_segments(cls, segments, meta=None):
+        speakers, speaker_ids = [], {}
+        strings, string_ids = [], {}
+
+        def intern_speaker(name):
+            if name is None:
+                return NO_SPEAKER
+            if name not in speaker_ids:
+                speaker_ids[name] = len(speakers)
+                speakers.append(name)
+            return speaker_ids[name]
+
+        def intern_string(text):
+            if text not in string_ids:
+                string_ids[text] = len(strings)
+                strings.append(text)
+            return string_ids[text]
+
+        def num(value):
+            return float("nan") if value is None else value
+
+        seg_start, seg_end, seg_speaker, seg_text, seg_word_offset = [], [], [], [], [0]
+        word_start, word_end, word_score, word_speaker, word_text = [], [], [], [], []
+
+        for seg in segments:
+            seg_start.append(num(seg.get("start")))
+            seg_end.append(num(seg.get("end")))
+            seg_speaker.append(intern_speaker(seg.get("speaker")))
+            seg_text.append(intern_string(seg.get("text", "")))
+            for word in seg.get("words", []):
+                word_start.append(num(word.get("start")))
+                word_end.append(num(word.get("end")))
+                word_score.append(num(word.get("score")))
+                word_speaker.append(intern_speaker(word.get("speaker")))
+                word_text.append(intern_string(word.get("word", "")))
+            seg_word_offset.append(len(word_text))
+
+        encoded = [s.encode("utf-8") for s in strings]
+        strings_offset = np.zeros(len(encoded) + 1, dtype=np.int64)
+        np.cumsum([len(b) for b in encoded], out=strings_offset[1:])
+
+        columns = {
+            "seg_start": np.array(seg_start, dtype=np.float32),
+            "seg_end": np.array(seg_end, dtype=np.float32),
+            "seg_speaker": np.array(seg_speaker, dtype=np.int32),
+            "seg_text": np.array(seg_text, dtype=np.int32),
+            "seg_word_offset": np.array(seg_word_offset, dtype=np.int64),
+            "word_start": np.array(word_start, dtype=np.float32),
+            "word_end": np.array(word_end, dtype=np.float32),
+            "word_score": np.array(word_score, dtype=np.float32),
+            "word_speaker": np.array(word_speaker, dtype=np.int32),
+            "word_text": np.array(word_text, dtype=np.int32),
+            "strings_blob": np.frombuffer(b"".join(encoded), dtype=np.uint8),
+            "strings_offset": strings_offset,
+        }
+        return cls(columns, speakers, meta)
+
+    # --- Acceso ---
+
+    def strings(self):
+        """Tabla de cadenas decodificada (no se guarda en el objeto: anularía el mapeo en memoria)"""
+        blob = bytes(self.strings_blob)
+        offsets = self.strings_offset.tolist()
+        return [blob[a:b].decode("utf-8") for a, b in zip(offsets, offsets[1:])]
+
+    def speaker_at(self, index):
+        return self.speakers[index] if index != NO_SPEAKER else None
+
+    def to_segments(self, include_words=True):
+        """Reconstruye la lista de dicts con el formato de WhisperX (solo en la frontera de la API)"""
+        strings = self.strings()
+
+        def value(x):
+            return None if np.isnan(x) else round(float(x), 3)
+
+        def put(d, key, x):
+            x = value(x)
+            if x is not None:
+                d[key] = x
+
+        seg_start, seg_end = self.seg_start.tolist(), self.seg_end.tolist()
+        seg_speaker, seg_text = self.seg_speaker.tolist(), self.seg_text.tolist()
+        offsets = self.seg_word_offset.tolist()
+        if include_words:
+            word_start, word_end = self.word_start.tolist(), self.word_end.tolist()
+            word_score, word_speaker = self.word_score.tolist(), self.word_speaker.tolist()
+            word_text = self.word_text.tolist()
+
+        segments = []
+        for i in range(len(self)):
+            seg = {"text": strings[seg_text[i]]}
+            put(seg, "start", seg_start[i])
+            put(seg, "end", seg_end[i])
+            speaker = self.speaker_at(seg_speaker[i])
+            if speaker is not None:
+                seg["speaker"] = speaker
+            if include_words:
+                words = []
+                for j in range(offsets[i], offsets[i + 1]):
+                    word = {"word": strings[word_text[j]]}
+                    put(word, "start", word_start[j])
+                    put(word, "end", word_end[j])
+                    put(word, "score", word_score[j])
+                    speaker = self.speaker_at(word_speaker[j])
+                    if speaker is not None:
+                        word["speaker"] = speaker
+                    words.append(word)
+                seg["words"] = words
+            segments.append(seg)
+        return segments
+
+    def nbytes(self):
+        return sum(getattr(self, name).nbytes for name in self.COLUMNS)
+
+    # --- Persistencia ---
+
+    def save(self, path):
+        """Escribe el archivo binario (escritura atómica: temporal + rename)"""
+        header = {"speakers": self.speakers, "meta": self.meta, "arrays": {}}
+        offset = 0
+        for name in self.COLUMNS:
+            arr = np.ascontiguousarray(getattr(self, name))
+            header["arrays"][name] = {"dtype": arr.dtype.str, "shape": list(arr.shape), "offset": offset}
+            offset += -(-arr.nbytes // ALIGN) * ALIGN
+
+        header_bytes = json.dumps(header, ensure_ascii=False).encode("utf-8")
+        data_start = -(-(len(MAGIC) + 8 + len(header_bytes)) // ALIGN) * ALIGN
+
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(MAGIC)
+            f.write(struct.pack("<Q", len(header_bytes)))
+            f.write(header_bytes)
+            for name in self.COLUMNS:
+                arr = np.ascontiguousarray(getattr(self, name))
+                f.seek(data_start + header["arrays"][name]["offset"])
+                f.write(arr.tobytes())
+            f.truncate(data_start + offset)
+        os.replace(tmp_path, path)
+        return path
+
+    @classmethod
+    def load(cls, path, mmap=True):
+        """Carga el archivo; con mmap=True las columnas se mapean en memoria en vez de leerse"""
+        with open(path, "rb") as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                raise ValueError(f"Formato de transcripción no reconocido: {path}")
+            (header_len,) = struct.unpack("<Q", f.read(8))
+            header = json.loads(f.read(header_len).decode("utf-8"))
+        data_start = -(-(len(MAGIC) + 8 + header_len) // ALIGN) * ALIGN
+
+        columns = {}
+        for name, spec in header["arrays"].items():
+            dtype, shape = np.dtype(spec["dtype"]), tuple(spec["shape"])
+            count = int(np.prod(shape))
+            if count == 0:
+                # mmap no admite regiones vacías
+                columns[name] = np.empty(shape, dtype=dtype)
+            elif mmap:
+                columns[name] = np.memmap(path, dtype=dtype, mode="r", offset=data_start + spec["offset"], shape=shape)
+            else:
+                columns[name] = np.fromfile(path, dtype=dtype, count=count,
+                                            offset=data_start + spec["offset"]).reshape(shape)
+        return cls(columns, header["speakers"], header.get("meta"))
@@ -27,6 +27,9 @@ import os
 import json
 import logging
 import re
+import time
+from services.metrics import stage, observe, record_gpu_peak, OCR_FPS, VAD_SKIPPED_SECONDS
+from services.vad import SpeechMap
 
 # Configuración de Logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -35,8 +38,10 @@ logger = logging.getLogger(__name__)
 # ================= CONFIGURACIÓN DEFAULT =================
 DEVICE = "cuda" if torch.cuda.is_available() else "cpu"
 BATCH_SIZE = 16
+WHISPER_MODEL = os.getenv("WHISPER_MODEL", "large-v3")
 COMPUTE_TYPE = "float16" if DEVICE == "cuda" else "int8"
 OCR_ENGINE = "easyocr" 
+VAD_ENABLED = os.getenv("VAD_ENABLED", "1") != "0"  # Saltar silencios antes de ASR/diarización/OCR
 
 # Inicializar OCR Reader globalmente (lazy load si se prefiere, pero aquí lo haremos global)
 ocr_reader = None
@@ -70,38 +75,94 @@ def load_hf_token(filepath):
         logger.error(f"ERROR leyendo token en {filepath}: {e}")
         return None
 
-def transcribe_audio(video_path, hf_token):
-    logger.info(f"--- 1. Iniciando WhisperX en {DEVICE} ---")
-    
-    # 1. Transcribir
+def free_memory():
+    gc.collect()
+    if torch.cuda.is_available():
+        torch.cuda.empty_cache()
+
+def load_audio(video_path, trace=None):
+    with stage("audio_decode", trace):
+        return whisperx.load_audio(video_path)
+
+def detect_speech(audio, trace=None):
+    started = time.time()
+    t0 = time.perf_counter()
+    speech_map = SpeechMap.from_audio(audio)
+    elapsed = time.perf_counter() - t0
+    stats = speech_map.stats()
+    observe("vad", elapsed)
+    VAD_SKIPPED_SECONDS.inc(stats["skipped_s"])
+    if trace is not None:
+        trace.add("vad", started, elapsed, speech_s=stats["speech_s"], skipped_s=stats["skipped_s"],
+                  skipped_ratio=stats["skipped_ratio"], regions=len(speech_map.regions))
+    logger.info(f"VAD: {stats['speech_s']:.0f}s de voz de {stats['total_s']:.0f}s "
+                f"({stats['skipped_ratio']:.0%} de cómputo ahorrado en {len(speech_map.regions)} regiones)")
+    return speech_map
+
+def run_asr(audio, trace=None):
     logger.info("Cargando modelo transcripción...")
-    model = whisperx.load_model("large-v3", DEVICE, compute_type=COMPUTE_TYPE)
-    audio = whisperx.load_audio(video_path)
-    result = model.transcribe(audio, batch_size=BATCH_SIZE)
+    with stage("asr_model_load", trace):
+        model = whisperx.load_model(WHISPER_MODEL, DEVICE, compute_type=COMPUTE_TYPE)
+    with stage("asr", trace):
+        result = model.transcribe(audio, batch_size=BATCH_SIZE)
+    record_gpu_peak()
     
     del model
-    gc.collect()
-    torch.cuda.empty_cache()
-    
-    # 2. Alinear
+    free_memory()
+    return result
+
+def run_alignment(result, audio, trace=None):
     logger.info("Alineando...")
-    model_a, metadata = whisperx.load_align_model(language_code=result["language"], device=DEVICE)
-    result = whisperx.align(result["segments"], model_a, metadata, audio, DEVICE, return_char_alignments=False)
+    with stage("align_model_load", trace):
+        model_a, metadata = whisperx.load_align_model(language_code=result["language"], device=DEVICE)
+    with stage("align", trace):
+        aligned = whisperx.align(result["segments"], model_a, metadata, audio, DEVICE, return_char_alignments=False)
+    record_gpu_peak()
+    aligned.setdefault("language", result["language"])
     
     del model_a
-    gc.collect()
-    torch.cuda.empty_cache()
-    
-    # 3. Diarizar
+    free_memory()
+    return aligned
+
+def run_diarization(result, audio, hf_token, trace=None):
     logger.info("Diarizando...")
     from whisperx.diarize import DiarizationPipeline
-    diarize_model = DiarizationPipeline(use_auth_token=hf_token, device=DEVICE)
-    diarize_segments = diarize_model(audio)
-    result = whisperx.assign_word_speakers(diarize_segments, result)
+    with stage("diarize_model_load", trace):
+        diarize_model = DiarizationPipeline(use_auth_token=hf_token, device=DEVICE)
+    with stage("diarize", trace):
+        diarize_segments = diarize_model(audio)
+        result = whisperx.assign_word_speakers(diarize_segments, result)
+    record_gpu_peak()
     
     del diarize_model
-    gc.collect()
-    torch.cuda.empty_cache()
+    free_memory()
+    return result
+
+def transcribe_audio(video_path, hf_token, trace=None):
+    logger.info(f"--- 1. Iniciando WhisperX en {DEVICE} ---")
+    
+    # 1. Transcribir
+    audio = load_audio(video_path, trace)
+    
+    # 0. Detectar voz: ASR, alineado y diarización se hacen solo sobre las zonas con voz
+    speech_map = None
+    if VAD_ENABLED:
+        speech_map = detect_speech(audio, trace)
+        audio = speech_map.compact(audio)
+    
+    result = run_asr(audio, trace)
+    
+    # 2. Alinear
+    result = run_alignment(result, audio, trace)
+    
+    # 3. Diarizar
+    result = run_diarization(result, audio, hf_token, trace)
+    
+    if speech_map:
+        # Volver a los tiempos del vídeo original
+        speech_map.remap_result(result)
+        result["vad"] = speech_map.stats()
+        result["suggested_cuts"] = speech_map.suggested_cuts()
     
     return result
 
@@ -179,10 +240,33 @@ def extract_text_from_frame(frame):
         return max(nombres_validos, key=len)
     return ""
 
-def identify_speakers_visually(video_path, segments, debug_dir=None):
+def speaker_check_points(segment, speech_map=None):
+    """Instantes (s) del segmento en los que se busca el rótulo con el nombre"""
+    duration = segment["end"] - segment["start"]
+    check_points = [
+        segment["start"] + 1.0,
+        segment["start"] + 3.0,
+        segment["start"] + (duration / 2)
+    ]
+    check_points = [t for t in check_points if t <= segment["end"]]
+    if speech_map:
+        # Solo muestrear mientras se habla (un segmento puede cruzar un silencio largo)
+        in_speech = [t for t in check_points if speech_map.contains(t)]
+        check_points = in_speech or check_points
+    return check_points
+
+def read_frame_at(cap, t):
+    cap.set(cv2.CAP_PROP_POS_MSEC, t * 1000)
+    ret, frame = cap.read()
+    return frame if ret else None
+
+def identify_speakers_visually(video_path, segments, debug_dir=None, trace=None, speech_map=None):
     logger.info(f"--- 2. Identificando Hablantes (Estrategia Multi-Frame) ---")
+    started = time.time()
     cap = cv2.VideoCapture(video_path)
     speaker_map = {} 
+    # Tiempos acumulados por fotograma (la traza guarda un único span agregado)
+    seek_s, ocr_s, n_frames = 0.0, 0.0, 0
     
     if debug_dir:
         os.makedirs(debug_dir, exist_ok=True)
@@ -195,22 +279,21 @@ def identify_speakers_visually(video_path, segments, debug_dir=None):
             segment["speaker"] = speaker_map[speaker_id]
             continue
             
-        duration = segment["end"] - segment["start"]
-        check_points = [
-            segment["start"] + 1.0,
-            segment["start"] + 3.0,
-            segment["start"] + (duration / 2)
-        ]
-        
         found_name = None
-        for t in check_points:
-            if t > segment["end"]: continue 
-            
-            cap.set(cv2.CAP_PROP_POS_MSEC, t * 1000)
-            ret, frame = cap.read()
-            if not ret: continue
+        for t in speaker_check_points(segment, speech_map):
+            t0 = time.perf_counter()
+            frame = read_frame_at(cap, t)
+            elapsed = time.perf_counter() - t0
+            seek_s += elapsed
+            observe("frame_seek", elapsed)
+            if frame is None: continue
             
+            t0 = time.perf_counter()
             raw_text = extract_text_from_frame(frame)
+            elapsed = time.perf_counter() - t0
+            ocr_s += elapsed
+            n_frames += 1
+            observe("ocr_frame", elapsed)
             
             if raw_text and is_valid_name(raw_text):
                 normalized = normalize_name(raw_text)
@@ -227,9 +310,34 @@ def identify_speakers_visually(video_path, segments, debug_dir=None):
             segment["speaker"] = found_name
             
     cap.release()
+    record_gpu_peak()
+    
+    ocr_fps = n_frames / ocr_s if ocr_s else 0.0
+    if n_frames:
+        OCR_FPS.set(ocr_fps)
+    total = time.time() - started
+    observe("identify_speakers_visually", total)
+    if trace is not None:
+        trace.add("identify_speakers_visually", started, total,
+                  frames=n_frames, seek_s=round(seek_s, 3), ocr_s=round(ocr_s, 3), ocr_fps=round(ocr_fps, 2))
     return segments, speaker_map
 
-def process_meeting_video(video_path, token_file_path):
+def process_visual_phase(video_path, transcript, trace=None, debug_dir=None):
+    """Fase 2: identifica hablantes por OCR sobre la transcripción y arma el resultado final"""
+    vad = transcript.get("vad")
+    speech_map = SpeechMap(vad["regions"], vad["total_s"]) if vad else None
+    final_segments, speaker_map = identify_speakers_visually(video_path, transcript["segments"], debug_dir=debug_dir,
+                                                             trace=trace, speech_map=speech_map)
+    
+    return {
+        "segments": final_segments,
+        "speakers_found": speaker_map,
+        "language": transcript.get("language", "es"), # Fallback seguro
+        "vad": vad,
+        "suggested_cuts": transcript.get("suggested_cuts")
+    }
+
+def process_meeting_video(video_path, token_file_path, trace=None):
     """Función principal llamada por la API"""
     if not os.path.exists(video_path):
         raise FileNotFoundError(f"Video no encontrado: {video_path}")
@@ -238,18 +346,13 @@ def process_meeting_video(video_path, token_file_path):
     if not hf_token:
         raise ValueError("Token no válido o no encontrado")
         
-    init_ocr()
+    with stage("ocr_model_load", trace):
+        init_ocr()
 
     # Fase 1: Audio
-    transcript = transcribe_audio(video_path, hf_token)
+    transcript = transcribe_audio(video_path, hf_token, trace)
     
     # Fase 2: Video
-    # Usar un directorio de debug temporal relativo al video
+    # Usar un directorio de debug temporal relativo al video (subido a UPLOAD_DIR)
     debug_dir = os.path.join(os.path.dirname(video_path), "debug_frames")
-    final_segments, speaker_map = identify_speakers_visually(video_path, transcript["segments"], debug_dir=debug_dir)
-    
-    return {
-        "segments": final_segments,
-        "speakers_found": speaker_map,
-        "language": transcript.get("language", "es") # Fallback seguro
-    }
+    return process_visual_phase(video_path, transcript, trace, debug_dir=debug_dir)
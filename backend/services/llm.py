@@ -3,6 +3,7 @@ import logging
 from google import genai
 from google.genai import types
 from dotenv import load_dotenv
+from services.metrics import stage
 
 load_dotenv()
 
@@ -14,7 +15,41 @@ GOOGLE_API_KEY = os.getenv("GOOGLE_API_KEY")
 if GOOGLE_API_KEY:
     logger.info("API Key detectada para Gemini")
 
-def generate_minutes(transcript_text, attendees_list, google_token=None, model_name=None):
+def build_transcript(segments, speaker_mapping=None):
+    """Construye el texto "Hablante: texto" que se envía al LLM a partir de los segmentos"""
+    speaker_mapping = speaker_mapping or {}
+    full_transcript = []
+    
+    for i, seg in enumerate(segments):
+        try:
+            # Asegurar que seg es un dict
+            if not isinstance(seg, dict):
+                logger.warning(f"Segmento {i} no es un diccionario: {type(seg)}")
+                continue
+                
+            # Obtener speaker de forma segura
+            original_speaker = seg.get("speaker") if "speaker" in seg else "Desconocido"
+            if original_speaker is None:
+                original_speaker = "Desconocido"
+                
+            final_name = speaker_mapping.get(original_speaker, original_speaker)
+            if not final_name: 
+                final_name = "Desconocido"
+            
+            text = seg.get("text", "").strip()
+            if text:  # Solo añadir si hay texto
+                full_transcript.append(f"{final_name}: {text}")
+        except Exception as e:
+            logger.error(f"Error procesando segmento {i}: {e}")
+            continue
+
+    return "\n".join(full_transcript)
+
+def is_minutes_error(minutes_md):
+    """generate_minutes no lanza excepciones: los errores se devuelven como texto que empieza por "Error" """
+    return not minutes_md or minutes_md.startswith("Error")
+
+def generate_minutes(transcript_text, attendees_list, google_token=None, model_name=None, trace=None):
     """
     Genera el acta usando la API de Gemini (google-genai).
     """
@@ -70,14 +105,15 @@ def generate_minutes(transcript_text, attendees_list, google_token=None, model_n
         # Inicializar cliente
         client = genai.Client(api_key=GOOGLE_API_KEY)
         
-        response = client.models.generate_content(
-            model=MODEL_NAME,
-            contents=user_prompt,
-            config=types.GenerateContentConfig(
-                system_instruction=system_prompt,
-                temperature=0.2
+        with stage("gemini_request", trace, model=MODEL_NAME):
+            response = client.models.generate_content(
+                model=MODEL_NAME,
+                contents=user_prompt,
+                config=types.GenerateContentConfig(
+                    system_instruction=system_prompt,
+                    temperature=0.2
+                )
             )
-        )
         
         return response.text
 
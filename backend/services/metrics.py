@@ -0,0 +1,86 @@
+import time
+import logging
+import threading
+from contextlib import contextmanager
+from prometheus_client import Histogram, Gauge, Counter, generate_latest, CONTENT_TYPE_LATEST
+
+logger = logging.getLogger("Metrics")
+
+# Buckets pensados para etapas que van de milisegundos (un fotograma) a horas (ASR de reuniones largas)
+STAGE_BUCKETS = (0.01, 0.05, 0.1, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600, 1800, 3600, 7200)
+
+STAGE_SECONDS = Histogram(
+    "actas_stage_seconds",
+    "Duración de cada etapa del pipeline de procesamiento",
+    ["stage"],
+    buckets=STAGE_BUCKETS,
+)
+JOBS_TOTAL = Counter("actas_jobs_total", "Trabajos de procesamiento terminados", ["status"])
+QUEUE_DEPTH = Gauge("actas_queue_depth", "Trabajos en cola pendientes de empezar")
+JOBS_IN_PROGRESS = Gauge("actas_jobs_in_progress", "Trabajos procesándose en este momento")
+GPU_MEMORY_PEAK = Gauge("actas_gpu_memory_peak_bytes", "Máximo de memoria GPU usada en el dispositivo desde el arranque")
+VAD_SKIPPED_SECONDS = Counter("actas_vad_skipped_seconds", "Segundos de audio sin voz que no pasan por ASR ni OCR")
+OCR_FPS = Gauge("actas_ocr_frames_per_second", "Fotogramas procesados por segundo en el último OCR de hablantes")
+
+class Trace:
+    """Spans con los tiempos de las etapas de un trabajo, legibles desde la API de estado"""
+
+    def __init__(self):
+        self.started_at = time.time()
+        self.spans = []
+        self._lock = threading.Lock()
+
+    def add(self, name, start, duration, **attrs):
+        span = {
+            "name": name,
+            "start": round(start - self.started_at, 3),  # Relativo al inicio del trabajo
+            "duration": round(duration, 3),
+        }
+        if attrs:
+            span["attrs"] = attrs
+        with self._lock:
+            self.spans.append(span)
+
+    def to_dict(self):
+        with self._lock:
+            spans = list(self.spans)
+        return {"started_at": self.started_at, "spans": spans}
+
+def observe(name, seconds):
+    STAGE_SECONDS.labels(stage=name).observe(seconds)
+
+@contextmanager
+def stage(name, trace=None, **attrs):
+    """Mide una etapa: la registra en el histograma y, si hay traza, como span"""
+    start = time.time()
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - t0
+        observe(name, elapsed)
+        if trace is not None:
+            trace.add(name, start, elapsed, **attrs)
+
+_gpu_peak_bytes = 0
+
+def record_gpu_peak():
+    """
+    Actualiza el máximo de memoria GPU observado (no-op sin CUDA).
+    Se lee la memoria usada del dispositivo, no solo la del allocator de PyTorch:
+    faster-whisper (ASR) y otras librerías reservan memoria por su cuenta.
+    """
+    global _gpu_peak_bytes
+    try:
+        import torch
+        if torch.cuda.is_available():
+            free, total = torch.cuda.mem_get_info()
+            used = max(total - free, torch.cuda.max_memory_reserved())
+            _gpu_peak_bytes = max(_gpu_peak_bytes, used)
+            GPU_MEMORY_PEAK.set(_gpu_peak_bytes)
+    except Exception as e:
+        logger.debug(f"No se pudo leer la memoria GPU: {e}")
+
+def render_metrics():
+    """Devuelve (contenido, content-type) en formato de exposición de Prometheus"""
+    return generate_latest(), CONTENT_TYPE_LATEST
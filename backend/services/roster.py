@@ -0,0 +1,229 @@
+import os
+import csv
+import json
+import hashlib
+import logging
+import pandas as pd
+
+logger = logging.getLogger("Roster")
+
+# Configuración
+ROSTERS_DIR = os.path.abspath("../rosters")  # Listas de asistentes subidas (original + parseado)
+SUPPORTED_EXTENSIONS = ('.xlsx', '.xls', '.xlsm', '.ods', '.csv')
+DEFAULT_EXTENSION = '.xlsx'  # Clientes antiguos envían la lista sin extensión
+CSV_CHUNK_SIZE = 50_000  # Filas por bloque al leer CSV grandes
+CSV_DELIMITERS = ',;\t|'  # Separadores candidatos (nunca el espacio: partiría los nombres)
+
+os.makedirs(ROSTERS_DIR, exist_ok=True)
+
+POSIBLES_APELLIDOS = ['apellidos', 'apellido', 'surname', 'surnames', 'last name', 'lastname', 'primer apellido']
+POSIBLES_NOMBRES = ['nombre', 'nombres', 'name', 'firstname', 'first name']
+VALORES_VACIOS = {'nan', 'nat', 'none'}
+
+# Cache en memoria de listas ya parseadas: hash del archivo -> lista de nombres
+_roster_cache = {}
+
+def file_hash(file_path):
+    """SHA-256 del contenido del archivo (leído por bloques)"""
+    h = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            h.update(block)
+    return h.hexdigest()
+
+def _engine_for(file_path):
+    ext = os.path.splitext(file_path)[1].lower()
+    if ext == '.ods':
+        return 'odf'
+    if ext == '.xls':
+        return 'xlrd'
+    return 'openpyxl'
+
+def _csv_sep(file_path):
+    """Detecta el separador del CSV con una muestra del principio; si no se puede, coma"""
+    with open(file_path, 'r', encoding='utf-8', errors='replace', newline='') as f:
+        sample = f.read(64 * 1024)
+    try:
+        return csv.Sniffer().sniff(sample, delimiters=CSV_DELIMITERS).delimiter
+    except csv.Error:
+        return ','
+
+def _read_columns(file_path, sep=None):
+    """Lee solo la cabecera para decidir qué columnas cargar"""
+    if file_path.lower().endswith('.csv'):
+        return list(pd.read_csv(file_path, nrows=0, sep=sep).columns)
+    return list(pd.read_excel(file_path, nrows=0, engine=_engine_for(file_path)).columns)
+
+def _iter_frames(file_path, usecols=None, sep=None):
+    """Lee el archivo cargando solo las columnas necesarias; los CSV se recorren por bloques"""
+    if file_path.lower().endswith('.csv'):
+        yield from pd.read_csv(file_path, usecols=usecols, dtype=str, sep=sep, chunksize=CSV_CHUNK_SIZE)
+    else:
+        yield pd.read_excel(file_path, usecols=usecols, dtype=str, engine=_engine_for(file_path))
+
+def _read_sample(file_path, nrows=100, sep=None):
+    if file_path.lower().endswith('.csv'):
+        return pd.read_csv(file_path, nrows=nrows, dtype=str, sep=sep)
+    return pd.read_excel(file_path, nrows=nrows, dtype=str, engine=_engine_for(file_path))
+
+def _find_column(normalized_cols, candidates, exclude=None):
+    for cand in candidates:
+        match = next((c for c in normalized_cols if (cand == c or cand in c) and normalized_cols[c] != exclude), None)
+        if match:
+            return normalized_cols[match]
+    return None
+
+def _clean(series):
+    """Normaliza una columna a texto, vaciando los valores nulos"""
+    s = series.fillna('').astype(str).str.strip()
+    return s.mask(s.str.lower().isin(VALORES_VACIOS), '')
+
+def _names_from_frame(df, name_col, surname_col):
+    """Nombres completos de un bloque del archivo, con operaciones vectorizadas"""
+    if name_col and surname_col:
+        # Concatenación vectorizada: "Nombre Apellidos", o el que exista
+        full_names = (_clean(df[name_col]) + ' ' + _clean(df[surname_col])).str.strip()
+    else:
+        full_names = _clean(df[name_col or surname_col])
+    full_names = full_names[(full_names.str.len() > 2) & (full_names.str.lower() != 'nan')]
+    return full_names.str.title()
+
+def parse_attendees(file_path):
+    """
+    Lee el Excel/CSV/ODS e intenta reconstruir nombres completos de forma inteligente.
+    Devuelve None si el archivo no se puede leer (para no confundirlo con una lista vacía).
+    """
+    try:
+        sep = _csv_sep(file_path) if file_path.lower().endswith('.csv') else None
+        raw_columns = _read_columns(file_path, sep)
+        normalized_cols = {str(c).strip().lower(): c for c in raw_columns}
+
+        logger.info(f"Columnas encontradas en lista de asistentes: {[str(c).strip() for c in raw_columns]}")
+
+        surname_col = _find_column(normalized_cols, POSIBLES_APELLIDOS)
+        name_col = _find_column(normalized_cols, POSIBLES_NOMBRES, exclude=surname_col)
+
+        if not name_col and not surname_col:
+            # Sin cabeceras reconocibles: primera columna mayoritariamente no numérica
+            sample_df = _read_sample(file_path, sep=sep)
+            for col in sample_df.columns:
+                sample = sample_df[col].dropna().head(5).astype(str)
+                if len(sample) and (~sample.str.isnumeric()).sum() >= len(sample) * 0.8:
+                    name_col = col
+                    break
+            if not name_col:
+                return []
+
+        usecols = [c for c in (name_col, surname_col) if c]
+        names = set()
+        for df in _iter_frames(file_path, usecols=usecols, sep=sep):
+            names.update(_names_from_frame(df, name_col, surname_col))
+        return sorted(names)
+    except Exception as e:
+        logger.error(f"Error leyendo lista de asistentes: {e}")
+        return None
+
+def is_valid_roster_id(roster_id):
+    return len(roster_id) == 64 and all(c in '0123456789abcdef' for c in roster_id)
+
+def _parsed_path(roster_id):
+    return os.path.join(ROSTERS_DIR, f"{roster_id}.json")
+
+def get_roster(roster_id):
+    """Devuelve la lista parseada de un roster (cache en memoria, luego disco) o None"""
+    if roster_id in _roster_cache:
+        return _roster_cache[roster_id]["attendees"]
+    if not is_valid_roster_id(roster_id):
+        return None
+    path = _parsed_path(roster_id)
+    if not os.path.exists(path):
+        return None
+    with open(path, 'r', encoding='utf-8') as f:
+        meta = json.load(f)
+    _roster_cache[roster_id] = meta
+    return meta["attendees"]
+
+def parse_attendees_cached(file_path, original_name=None, roster_id=None):
+    """
+    Parsea la lista solo si su contenido (hash) no se ha visto antes. Devuelve (roster_id, nombres).
+    Si el archivo no se pudo leer devuelve (roster_id, None) y no se guarda nada en cache.
+    """
+    roster_id = roster_id or file_hash(file_path)
+    cached = get_roster(roster_id)
+    if cached is not None:
+        logger.info(f"Lista de asistentes {roster_id[:12]} recuperada de cache")
+        return roster_id, cached
+
+    attendees = parse_attendees(file_path)
+    if attendees is None:
+        return roster_id, None
+    meta = {
+        "id": roster_id,
+        "name": original_name or os.path.basename(file_path),
+        "attendees": attendees,
+    }
+    with open(_parsed_path(roster_id), 'w', encoding='utf-8') as f:
+        json.dump(meta, f, ensure_ascii=False, indent=2)
+    _roster_cache[roster_id] = meta
+    return roster_id, attendees
+
+def roster_extension(original_name):
+    """Extensión con la que se guarda la lista; sin extensión se asume Excel (.xlsx), como antes"""
+    ext = os.path.splitext(original_name or "")[1].lower() or DEFAULT_EXTENSION
+    if ext not in SUPPORTED_EXTENSIONS:
+        raise ValueError(f"Formato de lista no soportado: {ext}")
+    return ext
+
+def save_roster_file(file_obj, original_name):
+    """Guarda un archivo de asistentes subido con su hash como nombre. Devuelve (roster_id, ruta)"""
+    ext = roster_extension(original_name)
+
+    tmp_path = os.path.join(ROSTERS_DIR, f".upload_{os.getpid()}_{id(file_obj)}{ext}")
+    h = hashlib.sha256()
+    with open(tmp_path, 'wb') as f:
+        for block in iter(lambda: file_obj.read(1024 * 1024), b''):
+            h.update(block)
+            f.write(block)
+
+    roster_id = h.hexdigest()
+    final_path = os.path.join(ROSTERS_DIR, f"{roster_id}{ext}")
+    if os.path.exists(final_path):
+        os.remove(tmp_path)
+    else:
+        os.replace(tmp_path, final_path)
+    return roster_id, final_path
+
+def list_rosters():
+    """Lista los rosters registrados (sin la lista completa de nombres)"""
+    rosters = []
+    for path in sorted(os.listdir(ROSTERS_DIR)):
+        if not path.endswith('.json'):
+            continue
+        roster_id = path[:-len('.json')]
+        try:
+            get_roster(roster_id)
+            meta = _roster_cache[roster_id]
+        except Exception as e:
+            logger.error(f"Error leyendo roster {roster_id}: {e}")
+            continue
+        rosters.append({
+            "id": roster_id,
+            "name": meta.get("name"),
+            "count": len(meta.get("attendees", [])),
+            "timestamp": os.path.getmtime(os.path.join(ROSTERS_DIR, path)),
+        })
+    rosters.sort(key=lambda x: x["timestamp"], reverse=True)
+    return rosters
+
+def delete_roster(roster_id):
+    """Elimina un roster (original y parseado). Devuelve False si no existía"""
+    if not is_valid_roster_id(roster_id):
+        return False
+    _roster_cache.pop(roster_id, None)
+    removed = False
+    for ext in SUPPORTED_EXTENSIONS + ('.json',):
+        path = os.path.join(ROSTERS_DIR, f"{roster_id}{ext}")
+        if os.path.exists(path):
+            os.remove(path)
+            removed = True
+    return removed
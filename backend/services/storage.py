@@ -0,0 +1,73 @@
+import os
+import logging
+import subprocess
+from typing import Optional
+
+from services.metrics import Trace, stage
+
+logger = logging.getLogger("Storage")
+
+# Configuración
+UPLOAD_DIR = os.path.abspath("../uploads") 
+SESSIONS_DIR = os.path.abspath("../sessions") # Nuevo directorio para sesiones
+ACTAS_DIR = os.path.abspath("../actas")  # Directorio para actas generadas
+TRANSCRIPTS_DIR = os.path.abspath("../transcripts")  # Transcripciones en formato columnar (mmap)
+TOKEN_FILE = "../../token-huggingface"
+
+os.makedirs(UPLOAD_DIR, exist_ok=True)
+os.makedirs(SESSIONS_DIR, exist_ok=True)
+os.makedirs(ACTAS_DIR, exist_ok=True)
+os.makedirs(TRANSCRIPTS_DIR, exist_ok=True)
+
+def sanitize_name(name: str, default: str) -> str:
+    """Limpia un nombre para usarlo como nombre de archivo"""
+    safe_name = "".join([c for c in name if c.isalnum() or c in (' ', '-', '_')]).strip()
+    return safe_name or default
+
+def save_acta_files(session_name: str, minutes_md: str, trace: Optional[Trace] = None) -> dict:
+    """Guarda el acta en markdown y la convierte a PDF con pandoc"""
+    with stage("save_acta_files", trace):
+        return _save_acta_files(session_name, minutes_md, trace)
+
+def _save_acta_files(session_name: str, minutes_md: str, trace: Optional[Trace] = None) -> dict:
+    # Limpiar nombre de archivo
+    safe_name = sanitize_name(session_name, "acta_sin_nombre")
+    
+    md_filename = f"acta_{safe_name}.md"
+    pdf_filename = f"acta_{safe_name}.pdf"
+    
+    md_path = os.path.join(ACTAS_DIR, md_filename)
+    pdf_path = os.path.join(ACTAS_DIR, pdf_filename)
+    
+    result = {"md": None, "pdf": None}
+    
+    try:
+        # Guardar markdown
+        with open(md_path, 'w', encoding='utf-8') as f:
+            f.write(minutes_md)
+        result["md"] = f"/actas/{md_filename}"
+        logger.info(f"Acta markdown guardada: {md_path}")
+        
+        # Convertir a PDF con pandoc
+        try:
+            with stage("pandoc_pdf", trace):
+                subprocess.run([
+                    "pandoc", md_path, 
+                    "-o", pdf_path,
+                    "--pdf-engine=xelatex",
+                    "-V", "geometry:margin=2.5cm",
+                    "-V", "mainfont:DejaVu Sans",
+                    "-V", "fontsize=11pt",
+                    "--toc",
+                    "--toc-depth=2"
+                ], check=True, capture_output=True, text=True)
+            result["pdf"] = f"/actas/{pdf_filename}"
+            logger.info(f"Acta PDF generada: {pdf_path}")
+        except subprocess.CalledProcessError as e:
+            logger.error(f"Error convirtiendo a PDF: {e.stderr}")
+        except FileNotFoundError:
+            logger.warning("pandoc no encontrado, saltando conversión a PDF")
+    except Exception as e:
+        logger.error(f"Error guardando acta: {e}")
+    
+    return result
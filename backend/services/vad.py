@@ -0,0 +1,144 @@
+import logging
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Configuración (audio a 16 kHz mono, como lo devuelve whisperx.load_audio)
+SAMPLE_RATE = 16000
+FRAME_MS = 30
+THRESHOLD_DB = 12.0        # dB por encima del ruido de fondo para considerar voz
+MIN_THRESHOLD_DB = -55.0   # Umbral absoluto mínimo (grabaciones casi en silencio digital)
+MAX_NOISE_FLOOR_DB = -45.0 # Un "ruido de fondo" más alto que esto es voz: se limita a este valor
+MIN_SILENCE_FRACTION = 0.02  # Con menos tramas en silencio no hay modo de silencio claro: no se salta nada
+MIN_SPEECH_S = 0.3         # Regiones de voz más cortas se descartan (clics, golpes)
+MIN_SILENCE_S = 2.0        # Silencios más cortos se mantienen (pausas normales al hablar)
+PADDING_S = 0.5            # Margen alrededor de cada región para no cortar palabras
+SUGGEST_MIN_SILENCE_S = 60.0  # Silencios a partir de los cuales se sugiere recortar
+
+def _noise_floor_db(energy_db):
+    """
+    Estimación bimodal del ruido de fondo: se separan las tramas en dos grupos
+    por el umbral de Otsu y se toma la mediana del grupo de menor energía.
+    Si la grabación no tiene silencios ese grupo es voz baja, por eso el
+    resultado se limita a MAX_NOISE_FLOOR_DB.
+    """
+    hist, edges = np.histogram(energy_db, bins=100)
+    centers = (edges[:-1] + edges[1:]) / 2
+    w_low = np.cumsum(hist)
+    w_high = w_low[-1] - w_low
+    m_low = np.cumsum(hist * centers)
+    mu_low = m_low / np.maximum(w_low, 1)
+    mu_high = (m_low[-1] - m_low) / np.maximum(w_high, 1)
+    split = centers[np.argmax(w_low * w_high * (mu_low - mu_high) ** 2)]
+    floor = float(np.median(energy_db[energy_db <= split]))
+    return min(floor, MAX_NOISE_FLOOR_DB)
+
+def detect_speech_regions(audio, sr=SAMPLE_RATE):
+    """Devuelve [(inicio, fin)] en segundos de las zonas con voz, por energía por tramas"""
+    frame = int(sr * FRAME_MS / 1000)
+    n_frames = len(audio) // frame
+    if n_frames == 0:
+        return []
+
+    frames = audio[:n_frames * frame].reshape(n_frames, frame).astype(np.float32)
+    energy_db = 10 * np.log10(np.mean(frames ** 2, axis=1) + 1e-10)
+    threshold = max(_noise_floor_db(energy_db) + THRESHOLD_DB, MIN_THRESHOLD_DB)
+    is_speech = energy_db > threshold
+
+    duration = len(audio) / sr
+    if 1.0 - is_speech.mean() < MIN_SILENCE_FRACTION:
+        # Sin modo de silencio claro (grabación ya recortada, reunión sin pausas): audio completo
+        return [(0.0, round(duration, 3))]
+
+    # Inicios y finales de cada tramo contiguo de voz
+    edges = np.diff(np.concatenate(([0], is_speech.astype(np.int8), [0])))
+    starts = np.flatnonzero(edges == 1) * frame / sr
+    ends = np.flatnonzero(edges == -1) * frame / sr
+
+    regions = []
+    for start, end in zip(starts, ends):
+        if regions and start - regions[-1][1] < MIN_SILENCE_S:
+            regions[-1][1] = end
+        else:
+            regions.append([start, end])
+
+    padded = []
+    for start, end in regions:
+        if end - start < MIN_SPEECH_S:
+            continue
+        start, end = max(0.0, start - PADDING_S), min(duration, end + PADDING_S)
+        if padded and start <= padded[-1][1]:
+            padded[-1][1] = end
+        else:
+            padded.append([start, end])
+    return [(round(float(s), 3), round(float(e), 3)) for s, e in padded]
+
+class SpeechMap:
+    """Mapa de actividad de voz: compacta el audio y traduce tiempos compactados a originales"""
+
+    def __init__(self, regions, duration, sr=SAMPLE_RATE):
+        self.sr = sr
+        self.duration = duration
+        self.regions = list(regions) or [(0.0, duration)]  # Sin voz detectada: no se salta nada
+        lengths = np.array([e - s for s, e in self.regions])
+        # Inicio de cada región dentro del audio compactado
+        self._compact_starts = np.concatenate(([0.0], np.cumsum(lengths)[:-1]))
+        self._orig_starts = np.array([s for s, _ in self.regions])
+
+    @classmethod
+    def from_audio(cls, audio, sr=SAMPLE_RATE):
+        return cls(detect_speech_regions(audio, sr), len(audio) / sr, sr)
+
+    @property
+    def speech_s(self):
+        return sum(e - s for s, e in self.regions)
+
+    def compact(self, audio):
+        """Concatena solo las regiones con voz"""
+        return np.concatenate([audio[int(s * self.sr):int(e * self.sr)] for s, e in self.regions])
+
+    def to_original(self, t):
+        i = max(0, int(np.searchsorted(self._compact_starts, t, side="right")) - 1)
+        return round(float(self._orig_starts[i] + (t - self._compact_starts[i])), 3)
+
+    def remap_result(self, result):
+        """Traduce en sitio los tiempos de segmentos y palabras de WhisperX al vídeo original"""
+        def remap(item):
+            for key in ("start", "end"):
+                if item.get(key) is not None:
+                    item[key] = self.to_original(item[key])
+
+        for seg in result.get("segments", []):
+            remap(seg)
+            for word in seg.get("words", []):
+                remap(word)
+        for word in result.get("word_segments", []):
+            remap(word)
+        return result
+
+    def contains(self, t):
+        return any(s <= t <= e for s, e in self.regions)
+
+    def stats(self):
+        skipped = self.duration - self.speech_s
+        return {
+            "total_s": round(self.duration, 2),
+            "speech_s": round(self.speech_s, 2),
+            "skipped_s": round(skipped, 2),
+            "skipped_ratio": round(skipped / self.duration, 4) if self.duration else 0.0,
+            "regions": [list(r) for r in self.regions],
+        }
+
+    def suggested_cuts(self, min_silence=SUGGEST_MIN_SILENCE_S):
+        """Puntos de recorte sugeridos: inicio/fin de la reunión y silencios largos intermedios"""
+        first_start, last_end = self.regions[0][0], self.regions[-1][1]
+        gaps = [
+            {"start": round(prev_end, 2), "end": round(start, 2)}
+            for (_, prev_end), (start, _) in zip(self.regions, self.regions[1:])
+            if start - prev_end >= min_silence
+        ]
+        return {
+            "start": round(first_start, 2) if first_start >= min_silence else None,
+            "end": round(last_end, 2) if self.duration - last_end >= min_silence else None,
+            "gaps": gaps,
+        }
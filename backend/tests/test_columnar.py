@@ -0,0 +1,45 @@
+import math
+
+from services.columnar import CompactTranscript
+
+SEGMENTS = [
+    {
+        "text": " Buenos días a todos.", "start": 0.5, "end": 2.25, "speaker": "SPEAKER_00",
+        "words": [
+            {"word": "Buenos", "start": 0.5, "end": 0.875, "score": 0.75, "speaker": "SPEAKER_00"},
+            {"word": "días", "start": 0.875, "end": 1.25, "score": 0.5},
+            {"word": "a"},  # El alineado no da tiempos ni puntuación a algunas palabras
+            {"word": "todos.", "start": 1.5, "end": 2.25},
+        ],
+    },
+    {"text": " Comenzamos.", "start": 3.0, "end": 4.0, "speaker": "Ana García", "words": []},
+    {"text": " Sin hablante.", "start": 5.0, "end": 6.5,
+     "words": [{"word": "Sin", "start": 5.0, "end": 5.5, "score": 1.0, "speaker": "Ana García"}]},
+]
+
+def test_round_trip_in_memory():
+    assert CompactTranscript.from_segments(SEGMENTS).to_segments() == SEGMENTS
+
+def test_round_trip_through_file(tmp_path):
+    path = str(tmp_path / "job.bin")
+    CompactTranscript.from_segments(SEGMENTS, {"language": "es"}).save(path)
+    for mmap in (True, False):
+        loaded = CompactTranscript.load(path, mmap=mmap)
+        assert loaded.meta == {"language": "es"}
+        assert loaded.to_segments() == SEGMENTS
+        assert loaded.to_segments(include_words=False) == [
+            {k: v for k, v in seg.items() if k != "words"} for seg in SEGMENTS]
+        assert math.isnan(loaded.word_start[2]) and math.isnan(loaded.word_score[3])
+
+def test_empty_transcript(tmp_path):
+    path = str(tmp_path / "empty.bin")
+    CompactTranscript.from_segments([]).save(path)
+    loaded = CompactTranscript.load(path)
+    assert len(loaded) == 0
+    assert loaded.to_segments() == []
+
+def test_segments_without_words(tmp_path):
+    segments = [{"text": "", "start": 1.0, "end": 2.0, "words": []}]
+    path = str(tmp_path / "nowords.bin")
+    CompactTranscript.from_segments(segments).save(path)
+    assert CompactTranscript.load(path).to_segments() == segments
@@ -0,0 +1,26 @@
+import pytest
+
+from services.roster import parse_attendees, roster_extension
+
+def write_csv(tmp_path, text):
+    path = tmp_path / "asistentes.csv"
+    path.write_text(text, encoding="utf-8")
+    return str(path)
+
+def test_single_column_csv_keeps_full_names(tmp_path):
+    path = write_csv(tmp_path, "Nombre completo\nAna García López\nLuis Pérez Gómez\nMaría de la Torre Ruiz\n")
+    assert parse_attendees(path) == ["Ana García López", "Luis Pérez Gómez", "María De La Torre Ruiz"]
+
+def test_semicolon_csv_joins_name_and_surname(tmp_path):
+    path = write_csv(tmp_path, "Nombre;Apellidos;DNI\nAna;García López;123\nLuis;Pérez Gómez;456\n")
+    assert parse_attendees(path) == ["Ana García López", "Luis Pérez Gómez"]
+
+def test_header_only_csv_is_an_empty_list(tmp_path):
+    path = write_csv(tmp_path, "Nombre\n")
+    assert parse_attendees(path) == []
+
+def test_roster_extension_defaults_to_xlsx():
+    assert roster_extension("asistentes") == ".xlsx"
+    assert roster_extension("Lista.CSV") == ".csv"
+    with pytest.raises(ValueError):
+        roster_extension("asistentes.pdf")
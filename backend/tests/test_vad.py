@@ -0,0 +1,39 @@
+import numpy as np
+
+from services.vad import detect_speech_regions, SpeechMap, SAMPLE_RATE
+
+def voz(seconds, db):
+    """Tono modulado a ritmo silábico con nivel RMS aproximado de `db` dBFS"""
+    t = np.arange(int(seconds * SAMPLE_RATE)) / SAMPLE_RATE
+    envelope = 0.6 + 0.4 * np.sin(2 * np.pi * 3 * t)
+    return (10 ** (db / 20) * np.sqrt(2) * envelope * np.sin(2 * np.pi * 220 * t)).astype(np.float32)
+
+def silencio(seconds):
+    return np.zeros(int(seconds * SAMPLE_RATE), dtype=np.float32)
+
+def speech_seconds(regions):
+    return sum(e - s for s, e in regions)
+
+def test_quiet_speaker_without_leading_silence_is_kept():
+    audio = np.concatenate([voz(100, -6), voz(100, -21.6)])
+    assert detect_speech_regions(audio) == [(0.0, 200.0)]
+
+def test_quiet_middle_speaker_is_kept():
+    audio = np.concatenate([voz(60, -6), voz(60, -26), voz(60, -6)])
+    assert detect_speech_regions(audio) == [(0.0, 180.0)]
+
+def test_silence_is_skipped_and_quiet_speaker_kept():
+    audio = np.concatenate([silencio(120), voz(60, -6), silencio(90), voz(30, -30)])
+    regions = detect_speech_regions(audio)
+    assert len(regions) == 2
+    assert regions[0][0] > 115 and regions[1][1] == 300.0
+    assert 89 < speech_seconds(regions) < 95
+
+def test_speech_map_remaps_compacted_times():
+    speech_map = SpeechMap([(10.0, 20.0), (50.0, 60.0)], 100.0)
+    result = {"segments": [{"start": 2.0, "end": 12.0, "words": [{"start": 11.0, "end": 12.0}]}]}
+    speech_map.remap_result(result)
+    seg = result["segments"][0]
+    assert (seg["start"], seg["end"]) == (12.0, 52.0)
+    assert (seg["words"][0]["start"], seg["words"][0]["end"]) == (51.0, 52.0)
+    assert speech_map.stats()["skipped_s"] == 80.0
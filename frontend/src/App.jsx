@@ -33,6 +33,7 @@ function App() {
   const [trimStart, setTrimStart] = useState(null);
   const [trimEnd, setTrimEnd] = useState(null);
   const [trimmingProcessing, setTrimmingProcessing] = useState(false);
+  const [suggestedCuts, setSuggestedCuts] = useState(null); // Silencios detectados por el backend (VAD)
   const [successMsg, setSuccessMsg] = useState("");
 
   // Auto-cerrar mensaje de éxito
@@ -160,6 +161,7 @@ function App() {
               video_url: session.video_url || "" 
           });
           setJobId("loaded-session"); 
+          setSuggestedCuts(null);
           setStatus("completed");
           setCurrentSessionName(sessionName); // Guardar el nombre actual
           setSessionName(sessionName);       // Pre-rellenar el input de guardado
@@ -195,6 +197,12 @@ function App() {
       if (type === 'end') setTrimEnd(current);
   };
 
+  const applySuggestedCuts = () => {
+      if (!suggestedCuts || !videoRef.current) return;
+      setTrimStart(suggestedCuts.start ?? 0);
+      setTrimEnd(suggestedCuts.end ?? videoRef.current.duration);
+  };
+
   const executeTrim = async () => {
       if (trimStart === null || trimEnd === null || trimEnd <= trimStart) {
           alert("Por favor define puntos de inicio y final válidos.");
@@ -229,6 +237,7 @@ function App() {
 
       setSegments(newSegments);
       setData(prev => ({ ...prev, video_url: newVideoUrl }));
+      setSuggestedCuts(null); // Los tiempos sugeridos ya no corresponden al nuevo video
       
       // No quitamos el spinner ni el modo recorte todavía, 
       // esperaremos a que el video cargue (useEffect más abajo)
@@ -264,6 +273,7 @@ function App() {
               if (!initialMap[spk]) initialMap[spk] = ""; 
             });
             setSpeakerMapping(initialMap);
+            setSuggestedCuts(resultData.result.suggested_cuts || null);
             setStatus("completed");
             clearInterval(interval);
           } else if (res.data.status === "failed") {
@@ -414,9 +424,9 @@ function App() {
                     <span className="block font-medium text-gray-700">{videoFile ? videoFile.name : "Selecciona el video"}</span>
                 </div>
                 <div className="border-2 border-dashed border-gray-300 rounded-lg p-6 hover:bg-gray-50 transition-colors text-center cursor-pointer relative">
-                    <input type="file" accept=".xlsx,.xls" onChange={e => setExcelFile(e.target.files[0])} className="absolute inset-0 opacity-0 cursor-pointer" />
+                    <input type="file" accept=".xlsx,.xls,.ods,.csv" onChange={e => setExcelFile(e.target.files[0])} className="absolute inset-0 opacity-0 cursor-pointer" />
                     <FileSpreadsheet className="w-10 h-10 text-green-600 mx-auto mb-2" />
-                    <span className="block font-medium text-gray-700">{excelFile ? excelFile.name : "Lista de asistentes (Excel)"}</span>
+                    <span className="block font-medium text-gray-700">{excelFile ? excelFile.name : "Lista de asistentes (Excel/CSV/ODS)"}</span>
                 </div>
                 <button onClick={handleUpload} disabled={!videoFile} className="w-full bg-blue-600 text-white py-3 rounded-lg font-semibold hover:bg-blue-700 disabled:opacity-50 mt-4">
                     Comenzar Procesamiento
@@ -565,6 +575,21 @@ function App() {
                                 </button>
                             </div>
 
+                            {suggestedCuts && (suggestedCuts.start !== null || suggestedCuts.end !== null) && (
+                                <button 
+                                    onClick={applySuggestedCuts}
+                                    className="px-3 py-1 bg-white border border-green-300 rounded text-xs font-bold hover:bg-green-50 text-green-700"
+                                    title="Quitar el silencio detectado al inicio y al final"
+                                >
+                                    Sugerencia: {fmtTime(suggestedCuts.start ?? 0)} ➔ {suggestedCuts.end !== null ? fmtTime(suggestedCuts.end) : "fin"}
+                                </button>
+                            )}
+                            {suggestedCuts?.gaps?.length > 0 && (
+                                <span className="text-xs text-gray-500" title={suggestedCuts.gaps.map(g => `${fmtTime(g.start)}-${fmtTime(g.end)}`).join(", ")}>
+                                    {suggestedCuts.gaps.length} silencios largos
+                                </span>
+                            )}
+
                             <div className="flex-grow"></div>
 
                             <button 